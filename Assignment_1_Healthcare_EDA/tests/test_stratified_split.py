@@ -0,0 +1,47 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="module")
+def eda(tmp_path_factory):
+    pytest.importorskip("cv2")
+    pytest.importorskip("seaborn")
+    # the script creates its output folder on import
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("eda"))
+    try:
+        import healthcare_eda_preprocessing
+    except (ImportError, OSError) as e:  # kaggle raises OSError on import without credentials
+        pytest.skip(f"EDA script dependencies unavailable: {e}")
+    finally:
+        os.chdir(cwd)
+    return healthcare_eda_preprocessing
+
+
+def test_splits_partition_rows_and_keep_class_proportions(eda):
+    y = np.array(["a"] * 600 + ["b"] * 300 + ["c"] * 100)
+    train, val, test = eda.stratified_split_indices(y, val_frac=0.15, test_frac=0.15)
+
+    # every row lands in exactly one split
+    combined = np.concatenate([train, val, test])
+    assert len(combined) == len(y)
+    assert set(combined) == set(range(len(y)))
+    assert not set(train) & set(val) and not set(train) & set(test) and not set(val) & set(test)
+
+    for part, frac in ((train, 0.70), (val, 0.15), (test, 0.15)):
+        assert len(part) == pytest.approx(len(y) * frac, abs=2)
+        labels, counts = np.unique(y[part], return_counts=True)
+        assert list(labels) == ["a", "b", "c"]
+        assert counts / counts.sum() == pytest.approx([0.6, 0.3, 0.1], abs=0.01)
+
+
+def test_splits_are_reproducible(eda):
+    y = np.repeat([0, 1], [50, 50])
+    first = eda.stratified_split_indices(y, seed=7)
+    second = eda.stratified_split_indices(y, seed=7)
+    assert all(np.array_equal(a, b) for a, b in zip(first, second))
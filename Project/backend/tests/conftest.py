@@ -0,0 +1,25 @@
+import importlib
+import os
+import shutil
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ICD_CSV = os.path.join(BACKEND_DIR, 'ICD10codes.csv')
+
+
+@pytest.fixture(scope='session')
+def backend(tmp_path_factory):
+    """The backend module, imported against a scratch database, upload dir and ICD cache."""
+    tmp = tmp_path_factory.mktemp('backend')
+    shutil.copy(ICD_CSV, tmp / 'ICD10codes.csv')
+    os.environ.update({
+        'DB_PATH': f"sqlite:///{tmp / 'test.db'}",
+        'ICD_CSV_PATH': str(tmp / 'ICD10codes.csv'),
+        'EHR_CSV_PATH': str(tmp / 'missing_ehr.csv'),
+        'UPLOAD_DIR': str(tmp / 'uploads'),
+    })
+    os.environ.pop('HF_API_TOKEN', None)
+    sys.path.insert(0, BACKEND_DIR)
+    return importlib.import_module('healthcare_backend_app')
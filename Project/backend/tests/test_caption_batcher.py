@@ -0,0 +1,31 @@
+import asyncio
+import time
+
+
+def test_close_fails_pending_requests(backend, monkeypatch):
+    def slow_captions(images):
+        time.sleep(0.2)
+        return [f'caption {image}' for image in images]
+
+    monkeypatch.setattr(backend, 'generate_captions', slow_captions)
+
+    async def scenario():
+        batcher = backend.CaptionBatcher(max_batch=2)
+        assert await batcher.submit(0) == 'caption 0'
+        # one batch in flight, the rest still queued when the app shuts down
+        pending = [asyncio.create_task(batcher.submit(i)) for i in range(1, 5)]
+        await asyncio.sleep(0.05)
+        await batcher.close()
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        # a later request starts a fresh worker
+        assert await batcher.submit(5) == 'caption 5'
+        await batcher.close()
+        return results
+
+    results = asyncio.run(scenario())
+    assert len(results) == 4
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_close_without_worker_is_a_no_op(backend):
+    asyncio.run(backend.CaptionBatcher().close())
@@ -0,0 +1,18 @@
+import os
+
+ICD_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ICD10codes.csv')
+
+
+def test_headerless_icd_csv_parses_to_string_codes(backend):
+    # the bundled CSV has no header row, so it goes through the cell-scanning fallback
+    icd_df = backend.parse_icd_csv(ICD_CSV)
+    assert not icd_df.empty
+    assert all(isinstance(code, str) and code for code in icd_df['code'])
+    assert icd_df['code'].is_unique
+    assert icd_df['desc'].notna().all()
+
+
+def test_icd_lookup_keys_are_strings(backend):
+    assert backend.ICD_LOOKUP
+    assert all(isinstance(code, str) and code for code in backend.ICD_LOOKUP)
+    assert backend.ICD_LOOKUP['A001'] == 'Cholera due to Vibrio cholerae 01, biovar eltor'
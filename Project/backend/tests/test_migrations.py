@@ -0,0 +1,25 @@
+from sqlalchemy import event, select, text
+
+
+def test_migrate_schema_runs_once(backend):
+    backend.migrate_schema()
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(backend.engine, 'before_cursor_execute', listener)
+    try:
+        backend.migrate_schema()
+    finally:
+        event.remove(backend.engine, 'before_cursor_execute', listener)
+    # an up-to-date database only has its schema version read
+    assert len(statements) == 1 and 'schema_version' in statements[0]
+    with backend.engine.connect() as conn:
+        assert conn.scalars(select(backend.SchemaVersion.version)).all() == [backend.SCHEMA_VERSION]
+
+
+def test_migrate_schema_clears_invalid_legacy_json(backend):
+    with backend.engine.begin() as conn:
+        conn.execute(text("DELETE FROM schema_version"))
+        conn.execute(text("INSERT INTO patients (patient_uid, extra) VALUES ('LEGACY-1', 'not json')"))
+    backend.migrate_schema()
+    with backend.engine.connect() as conn:
+        assert conn.scalar(text("SELECT extra FROM patients WHERE patient_uid = 'LEGACY-1'")) is None
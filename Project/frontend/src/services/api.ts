@@ -50,7 +50,8 @@ export interface SummaryResponse {
 export interface ImageUploadResponse {
   filename: string;
   size: number;
-  base64: string;
+  url: string;
+  base64?: string;
   content_type: string;
 }
 